@@ -73,6 +73,31 @@ EXAMPLES = r'''
     canmount: false
     state: present
 
+#Create zpool in the background and collect the result later
+- name: Create zpool in background
+  kuit_zfs:
+    name: dstor0
+    raidz: raidz2
+    disks:
+        -   sda
+        -   sdb
+        -   sdc
+        -   sdd
+    hot_spare:
+        -   sde
+    state: present
+  async: 300
+  poll: 0
+  register: zpool_job
+
+- name: Wait for zpool
+  async_status:
+    jid: "{{ zpool_job.ansible_job_id }}"
+  register: zpool_result
+  until: zpool_result.finished
+  retries: 30
+  delay: 10
+
 #Delete zpool
 - name: Zfs facts
   kuit_zfs::
@@ -92,21 +117,82 @@ EXAMPLES = r'''
     state: import
 '''
 
+import os
 import subprocess
+from functools import lru_cache
+from types import MappingProxyType
 from ansible.module_utils.basic import AnsibleModule
-from typing import List
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+KSTAT_ZFS_DIR = '/proc/spl/kstat/zfs'
+
+RAID_MIN_DISKS = MappingProxyType({
+    'stripe': 1,
+    'mirror': 2,
+    'raidz': 3,
+    'raidz1': 3,
+    'raidz2': 4,
+    'raidz3': 5,
+})
+
+STATUS_SECTIONS = frozenset({b'logs', b'cache', b'spares', b'special', b'dedup'})
+
+# libzfs default import search paths, in the order it strips them from vdev names
+VDEV_SEARCH_PATHS = (
+    '/dev/disk/by-vdev',
+    '/dev/mapper',
+    '/dev/disk/by-partlabel',
+    '/dev/disk/by-partuuid',
+    '/dev/disk/by-label',
+    '/dev/disk/by-uuid',
+    '/dev/disk/by-id',
+    '/dev/disk/by-path',
+    '/dev',
+)
 
 def run_command(command: List[str], module: AnsibleModule, error_msg: str) -> None:
-    try:
-        subprocess.run(command, check=True)
-    except subprocess.CalledProcessError:
+    # Keep child output off stdout, which carries the module's JSON result
+    if subprocess.call(command, stdout=subprocess.DEVNULL, close_fds=False) != 0:
         module.fail_json(msg=error_msg)
 
-def create_zpool(name: str, raid_type: str, disks: List[str], module: AnsibleModule) -> None:
-    command = ['zpool', 'create', name]
+def _spawn_and_wait(argv: List[str]) -> Tuple[int, bytes]:
+    # posix_spawn uses vfork, so the child does not copy the module's page tables the way fork does
+    if not hasattr(os, 'posix_spawnp'):
+        try:
+            result = subprocess.run(argv, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, close_fds=False)
+        except OSError:
+            return 127, b''
+        return result.returncode, result.stdout
+
+    read_fd, write_fd = os.pipe()
+    try:
+        pid = os.posix_spawnp(argv[0], argv, os.environ, file_actions=[
+            (os.POSIX_SPAWN_DUP2, write_fd, 1),
+            (os.POSIX_SPAWN_OPEN, 2, os.devnull, os.O_WRONLY, 0),
+        ])
+    except OSError:
+        os.close(read_fd)
+        return 127, b''
+    finally:
+        os.close(write_fd)
+
+    with os.fdopen(read_fd, 'rb') as pipe:
+        output = pipe.read()
+    _, status = os.waitpid(pid, 0)
+    return (os.WEXITSTATUS(status) if os.WIFEXITED(status) else -1), output
+
+def create_zpool(name: str, raid_type: str, disks: List[str], module: AnsibleModule,
+                 spares: Optional[List[str]] = None, dataset_opts: Optional[List[str]] = None) -> None:
+    command = ['zpool', 'create']
+    for option in dataset_opts or []:
+        command.extend(['-O', option])
+    command.append(name)
     if raid_type != 'stripe':
         command.append(raid_type)
     command.extend(disks)
+    if spares:
+        command.append('spare')
+        command.extend(spares)
     run_command(command, module, f"Failed to create zpool '{name}'")
 
 def create_volume(name: str, size: str, module: AnsibleModule) -> None:
@@ -120,40 +206,38 @@ def destroy_volume(name: str, module: AnsibleModule) -> None:
     run_command(['zfs', 'destroy', name], module, f"Failed to destroy volume '{name}'")
 
 def set_zpool_options(name: str, options: List[str], module: AnsibleModule) -> None:
-    for option in options:
-        command = ['zfs', 'set', option, name]
-        run_command(command, module, f"Failed to set option '{option}' on zpool '{name}'")
-
-def check_zpool_exists(name: str) -> bool:
-    try:
-        subprocess.run(['zpool', 'list', name], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        return True
-    except subprocess.CalledProcessError:
-        return False
+    # zfs set takes any number of property=value pairs, so set them all in one call
+    command = ['zfs', 'set', *options, name]
+    run_command(command, module, f"Failed to set options '{', '.join(options)}' on zpool '{name}'")
+
+def _existing_pools(check_mode: bool = False) -> FrozenSet[str]:
+    # In check mode, read the per-pool kstat directories on Linux so --check runs fork nothing
+    if check_mode:
+        try:
+            return frozenset(entry for entry in os.listdir(KSTAT_ZFS_DIR)
+                             if os.path.isdir(os.path.join(KSTAT_ZFS_DIR, entry)))
+        except OSError:
+            pass
+
+    rc, output = _spawn_and_wait(['zpool', 'list', '-H', '-o', 'name'])
+    if rc != 0:
+        return frozenset()
+    return frozenset(output.decode().splitlines())
+
+def check_zpool_exists(name: str, check_mode: bool = False) -> bool:
+    return name in _existing_pools(check_mode)
 
 def check_volume_exists(name: str) -> bool:
-    try:
-        subprocess.run(['zfs', 'list', name], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        return True
-    except subprocess.CalledProcessError:
-        return False
+    rc, _ = _spawn_and_wait(['zfs', 'list', name])
+    return rc == 0
 
 def validate_raid_disks(raid_type: str, disks: List[str], module: AnsibleModule) -> None:
-    raid_min_disks = {
-        'stripe': 1,
-        'mirror': 2,
-        'raidz': 3,
-        'raidz1': 3,
-        'raidz2': 4,
-        'raidz3': 5,
-    }
-
     if raid_type == 'raidz1':
         raid_type = 'raidz'
 
-    min_disks = raid_min_disks.get(raid_type)
+    min_disks = RAID_MIN_DISKS.get(raid_type)
     if min_disks is None:
-        module.fail_json(msg=f"Invalid RAID type '{raid_type}'. Valid types are: {', '.join(raid_min_disks.keys())}")
+        module.fail_json(msg=f"Invalid RAID type '{raid_type}'. Valid types are: {', '.join(RAID_MIN_DISKS.keys())}")
 
     if len(disks) < min_disks:
         module.fail_json(
@@ -161,39 +245,59 @@ def validate_raid_disks(raid_type: str, disks: List[str], module: AnsibleModule)
                 f"Provided disks: {len(disks)} ({disks})"
         )
 
+def _parse_zpool_status(output: bytes) -> Dict[bytes, FrozenSet[bytes]]:
+    # Index the config block of zpool status by section (data, logs, cache, spares, ...)
+    sections = {}
+    section = None
+    for line in output.splitlines():
+        fields = line.split()
+        if not fields:
+            continue
+        if fields[0] == b'NAME':
+            section = b'data'
+        elif section is None:
+            continue
+        elif fields[0] == b'errors:':
+            break
+        elif len(fields) == 1 and fields[0] in STATUS_SECTIONS:
+            section = fields[0]
+        else:
+            sections.setdefault(section, set()).add(fields[0])
+    return {section: frozenset(devices) for section, devices in sections.items()}
+
+@lru_cache(maxsize=None)
+def _pool_status_index(zpool: str) -> Dict[bytes, FrozenSet[bytes]]:
+    # Parsed straight from the bytes read off the pipe; the output is never decoded
+    rc, output = _spawn_and_wait(['zpool', 'status', zpool])
+    if rc != 0:
+        return {}
+    return _parse_zpool_status(output)
+
+def _vdev_name(device: str) -> bytes:
+    # zpool status prints vdevs with their import search directory stripped, as libzfs does
+    for directory in VDEV_SEARCH_PATHS:
+        if device.startswith(directory + '/'):
+            return device[len(directory) + 1:].encode()
+    return device.encode()
+
+def _pool_has_device(zpool: str, section: bytes, device: str) -> bool:
+    devices = _pool_status_index(zpool).get(section, frozenset())
+    return device.encode() in devices or _vdev_name(device) in devices
+
 def cache_device_exists(zpool: str, device: str) -> bool:
-    try:
-        result = subprocess.run(
-            ['zpool', 'status', zpool],
-            check=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            universal_newlines=True
-        )
-        return f"cache" in result.stdout and device in result.stdout
-    except subprocess.CalledProcessError:
-        return False
+    return _pool_has_device(zpool, b'cache', device)
 
 def add_cache_to_zpool(zpool: str, device: str, module: AnsibleModule) -> None:
     command = ['zpool', 'add', zpool, 'cache', device]
     run_command(command, module, f"Failed to add cache device '{device}' to zpool '{zpool}'")
 
 def hotspare_exists(zpool: str, device: str) -> bool:
-    try:
-        result = subprocess.run(
-            ['zpool', 'status', zpool],
-            check=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            universal_newlines=True
-        )
-        return 'spares' in result.stdout and device in result.stdout
-    except subprocess.CalledProcessError:
-        return False
+    return _pool_has_device(zpool, b'spares', device)
 
-def add_hotspare(zpool: str, device: str, module: AnsibleModule) -> None:
-    command = ['zpool', 'add', zpool, 'spare', device]
-    run_command(command, module, f"Failed to add hot spare '{device}' to zpool '{zpool}'")
+def add_hotspares(zpool: str, devices: List[str], module: AnsibleModule) -> None:
+    # zpool add takes any number of spares, so add them all in one atomic call
+    command = ['zpool', 'add', zpool, 'spare', *devices]
+    run_command(command, module, f"Failed to add hot spares '{', '.join(devices)}' to zpool '{zpool}'")
 
 def run_module():
     module_args = dict(
@@ -223,26 +327,36 @@ def run_module():
 
     # Handle zpool creation/deletion
     if obj_type == 'zpool':
-        validate_raid_disks(module.params['raidz'], module.params['disks'], module)
-        pool_exists = check_zpool_exists(name)
+        if state == 'present':
+            validate_raid_disks(module.params['raidz'], module.params['disks'], module)
+        pool_exists = check_zpool_exists(name, module.check_mode)
 
         if state == 'present':
             if not pool_exists and module.params['hot_spare'] and not module.params['disks']:
                 module.fail_json(msg=f"Cannot create zpool '{name}' with hot spares but without disks.")
 
             if not pool_exists:
-                create_zpool(name, module.params['raidz'], module.params['disks'], module)
+                if module.check_mode:
+                    module.exit_json(changed=True, msg=f"Would create zpool '{name}' (check mode).")
+                # A new pool gets its options and spares in the create call instead of separate zfs set/zpool add calls
+                create_zpool(name, module.params['raidz'], module.params['disks'], module,
+                             spares=module.params['hot_spare'], dataset_opts=options)
                 changed = True
+            else:
+                spares = [spare for spare in module.params['hot_spare'] if not hotspare_exists(name, spare)]
+                if module.check_mode:
+                    if spares:
+                        module.exit_json(changed=True, msg=f"Would add hot spares '{', '.join(spares)}' to zpool '{name}' (check mode).")
+                    module.exit_json(changed=False, msg=f"Zpool '{name}' already exists (check mode).")
 
-            option_changed = set_zpool_options(name, options, module)
-            if option_changed:
-                changed = True
+                set_zpool_options(name, options, module)
 
-            for spare in module.params['hot_spare']:
-                if not hotspare_exists(name, spare):
-                    add_hotspare(name, spare, module)
+                if spares:
+                    add_hotspares(name, spares, module)
                     changed = True
-                module.exit_json(**result)
+
+            result['changed'] = changed
+            module.exit_json(**result)
 
         elif state == 'absent':
             if pool_exists: